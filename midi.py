@@ -1,6 +1,9 @@
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
 from mido import MidiFile
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 
 def generate_html_grid(notes, ticks_per_beat, title="Piano Roll"):
     # HTML structure for visualization
@@ -77,12 +80,13 @@ def generate_notes_html(notes):
         """
     return notes_html
 
-def extract_notes(file_path, track_name="Synth Bass"):
+def extract_notes(file_path, track_name="Synth Bass", verbose=False):
     """
     Extract note-on and note-off events from a specific track in a MIDI file.
 
     :param file_path: Path to the MIDI file
     :param track_name: Name of the track to extract events from (default is "Synth Bass")
+    :param verbose: Print every note event as it is parsed
     :return: List of dictionaries with note, start_time, duration
     """
     midi_file = MidiFile(file_path)
@@ -98,20 +102,23 @@ def extract_notes(file_path, track_name="Synth Bass"):
             if msg.type == 'track_name' and msg.name == track_name:
                 track_name_found = True
                 track_found = True
-                print(f"Processing track: {msg.name}")  # Debug: Show track name
+                if verbose:
+                    print(f"Processing track: {msg.name}")  # Debug: Show track name
                 break
 
         if track_found and track_name_found:
             for msg in track:
                 current_time += msg.time  # Increment cumulative time
                 if msg.type == "note_on" and msg.velocity > 0:
-                    print(f"Note ON: {msg.note}, Time: {current_time}")  # Debug
+                    if verbose:
+                        print(f"Note ON: {msg.note}, Time: {current_time}")  # Debug
                     active_notes[msg.note] = current_time
                 elif msg.type == "note_off" or (msg.type == "note_on" and msg.velocity == 0):
                     if msg.note in active_notes:
                         start_time = active_notes.pop(msg.note)
                         duration = current_time - start_time
-                        print(f"Note OFF: {msg.note}, Start: {start_time}, Duration: {duration}")  # Debug
+                        if verbose:
+                            print(f"Note OFF: {msg.note}, Start: {start_time}, Duration: {duration}")  # Debug
                         notes.append({
                             "note": msg.note,
                             "start_time": start_time,
@@ -125,10 +132,87 @@ def extract_notes(file_path, track_name="Synth Bass"):
 
     return notes, midi_file.ticks_per_beat
 
+def process_file(args):
+    """
+    Extract notes from one MIDI file and write its piano roll into the output directory.
+
+    Runs inside a worker process, so only a small summary is sent back to the parent.
+    """
+    file_path, track_name, output_dir = args
+    started = time.perf_counter()
+    summary = {"file": file_path, "notes": 0, "output": None, "error": None}
+    try:
+        notes, ticks_per_beat = extract_notes(file_path, track_name=track_name)
+        summary["notes"] = len(notes)
+        if notes:
+            # Keep the extension so song.mid and song.MID don't overwrite each other
+            name = os.path.basename(file_path)
+            output_path = os.path.join(output_dir, f"{name}.html")
+            with open(output_path, "w") as file:
+                file.write(generate_html_grid(notes, ticks_per_beat, title=name))
+            summary["output"] = output_path
+    except Exception as e:
+        # mido raises a bare EOFError for truncated files, so always include the type
+        summary["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+def process_directory(input_dir, track_name="Synth Bass", output_dir="piano_rolls", workers=None):
+    """
+    Generate piano rolls for every MIDI file in a directory using a process pool.
+
+    Results are appended to ``index.jsonl`` in the output directory as workers finish;
+    only running totals are kept in memory.
+
+    :return: Dictionary with total, failed and empty file counts
+    """
+    files = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith((".mid", ".midi"))
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(file_path, track_name, output_dir) for file_path in files]
+
+    counts = {"total": 0, "failed": 0, "empty": 0}
+    started = time.perf_counter()
+    with Pool(processes=workers) as pool, \
+            open(os.path.join(output_dir, "index.jsonl"), "w") as index:
+        for summary in pool.imap_unordered(process_file, tasks, chunksize=4):
+            index.write(json.dumps(summary) + "\n")
+            index.flush()
+            counts["total"] += 1
+            if summary["error"] is not None:
+                counts["failed"] += 1
+                status = summary["error"]
+            else:
+                if not summary["notes"]:
+                    counts["empty"] += 1
+                status = f"{summary['notes']} notes"
+            print(f"{summary['seconds']:7.3f}s  {summary['file']}: {status}")
+
+    print(f"Processed {counts['total']} files in {time.perf_counter() - started:.2f}s "
+          f"({counts['failed']} failed, {counts['empty']} without track '{track_name}'). "
+          f"Output in '{output_dir}'.")
+    return counts
+
 if __name__ == "__main__":
-    midi_file_path = "melody.mid"  # Path to your MIDI file
-    notes, ticks_per_beat = extract_notes(midi_file_path, track_name="Synth Bass")
-    html_output = generate_html_grid(notes, ticks_per_beat=480)  # Pass the appropriate ticks_per_beat
-    with open("piano_roll.html", "w") as file:
-        file.write(html_output)
-    print("Piano roll saved as 'piano_roll.html'. Open it in a browser.")
+    parser = argparse.ArgumentParser(description="Render MIDI tracks as HTML piano rolls.")
+    parser.add_argument("path", nargs="?", default="melody.mid", help="MIDI file or directory of MIDI files")
+    parser.add_argument("--track", default="Synth Bass", help="Name of the track to extract")
+    parser.add_argument("--output", help="Output HTML file, or output directory in batch mode")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--verbose", action="store_true", help="Print every note event (single file only)")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        if args.verbose:
+            parser.error("--verbose is only supported for a single MIDI file")
+        process_directory(args.path, track_name=args.track, output_dir=args.output or "piano_rolls",
+                          workers=args.workers)
+    else:
+        output_path = args.output or "piano_roll.html"
+        notes, ticks_per_beat = extract_notes(args.path, track_name=args.track, verbose=args.verbose)
+        html_output = generate_html_grid(notes, ticks_per_beat=ticks_per_beat)
+        with open(output_path, "w") as file:
+            file.write(html_output)
+        print(f"Piano roll saved as '{output_path}'. Open it in a browser.")
@@ -1,6 +1,9 @@
+import argparse
 import pygame
 import pygame.midi
+import pygame.sndarray
 import time
+import numpy as np
 from typing import List, Dict, Union
 from concurrent.futures import ThreadPoolExecutor
 import mido
@@ -20,6 +23,13 @@ sounds = {
     "hho": pygame.mixer.Sound("samples/hho.wav"),
 }
 
+# Reserve two mixer channels for the bounced drum loop so one-shot sounds never steal them.
+# Passes alternate between them, letting the previous pass's tails ring out like live hits.
+LOOP_CHANNELS = (0, 1)
+pygame.mixer.set_reserved(len(LOOP_CHANNELS))
+loop_cache = {}  # (bpm, loop_beats, pattern content) -> pre-mixed pygame.mixer.Sound
+loop_channel_index = 0
+
 # Initialize MIDI output
 midi_output_name = "IAC Driver Bus 1"
 try:
@@ -76,18 +86,79 @@ def midi_to_patterns(midi_file: str, track_name: str, bpm: int = 120) -> List[Pa
     print(f"Extracted {len(patterns)} patterns from track '{track_name}'")
     return patterns
 
+def is_sample_pattern(pattern: Pattern) -> bool:
+    return pattern.get("midi_note") is None and pattern.get("sound") in sounds
+
+# Pre-mix sample patterns into a single sound starting at the loop's first beat
+def mix_loop(patterns: List[Pattern], bpm: int, loop_beats: int):
+    frequency = pygame.mixer.get_init()[0]
+    total_eighth_beats = loop_beats * 8
+    eighth_beat_duration = 60 / bpm / 8
+
+    samples = {name: pygame.sndarray.array(sounds[name]) for name in {p["sound"] for p in patterns}}
+    hits = []  # (start frame, sample name, volume)
+    for pattern in patterns:
+        volume = min(max(pattern.get("velocity", 100), 0.0), 1.0)
+        beat_schedule = pattern["beats"]
+        for i in range(total_eighth_beats):
+            # Same hit test as play_pattern, so the bounce matches live playback
+            if i / 8 in beat_schedule:
+                hits.append((round(i * eighth_beat_duration * frequency), pattern["sound"], volume))
+
+    # Tails past the loop end are kept, so the buffer can run longer than one pass
+    loop_length = round(total_eighth_beats * eighth_beat_duration * frequency)
+    length = max([loop_length] + [start + len(samples[name]) for start, name, _ in hits])
+    first = next(iter(samples.values()))
+    dtype = first.dtype
+    mix = np.zeros((length,) + first.shape[1:], dtype=np.float64)
+    for start, name, volume in hits:
+        sample = samples[name]
+        mix[start:start + len(sample)] += sample * volume
+
+    if np.issubdtype(dtype, np.integer):
+        limits = np.iinfo(dtype)
+        mix = np.clip(np.rint(mix), limits.min, limits.max)
+    else:
+        mix = np.clip(mix, -1.0, 1.0)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(mix.astype(dtype)))
+
+# Return the bounced loop for the sample patterns, re-mixing only when pattern or tempo changed
+def bounce_patterns(patterns: List[Pattern], bpm: int, loop_beats: int):
+    if not patterns:
+        return None
+    key = (bpm, loop_beats, tuple(
+        (p["sound"], tuple(p["beats"]), p.get("velocity", 100)) for p in patterns
+    ))
+    if key not in loop_cache:
+        loop_cache.clear()  # Drop the stale bounce
+        loop_cache[key] = mix_loop(patterns, bpm, loop_beats)
+    return loop_cache[key]
+
+# Start a bounced loop on the reserved channel that isn't still ringing out the last pass
+def play_loop(loop_sound):
+    global loop_channel_index
+    loop_channel_index = (loop_channel_index + 1) % len(LOOP_CHANNELS)
+    pygame.mixer.Channel(LOOP_CHANNELS[loop_channel_index]).play(loop_sound)
+
 # Play a pattern
 def play_pattern(patterns: List[Pattern], bpm: int = 120, loop_beats: int = 32):
     beat_duration = 60 / bpm  # Duration of a single beat in seconds
     total_eighth_beats = loop_beats * 8  # Total eighth beats for the loop
     eighth_beat_duration = beat_duration / 8  # Duration of an eighth beat
 
+    # Static drum parts play as one cached buffer instead of per-hit sounds
+    loop_sound = bounce_patterns([p for p in patterns if is_sample_pattern(p)], bpm, loop_beats)
+    live_patterns = [p for p in patterns if not is_sample_pattern(p)]
+
     start_time = time.time()
     with ThreadPoolExecutor() as executor:
         for i in range(total_eighth_beats):
             current_time_in_beats = i / 8  # Current time in full beats (eighths divided by 8)
 
-            for pattern in patterns:
+            if i == 0 and loop_sound is not None:
+                play_loop(loop_sound)  # Restart in sync with the transport
+
+            for pattern in live_patterns:
                 midi_note = pattern.get("midi_note")
                 beat_schedule = pattern["beats"]
                 velocity = pattern.get("velocity", 100)
@@ -106,6 +177,69 @@ def play_pattern(patterns: List[Pattern], bpm: int = 120, loop_beats: int = 32):
             if wait_time > 0:
                 time.sleep(wait_time)
 
+# General MIDI percussion notes for the drum samples
+drum_notes = {
+    "bd": 36,   # Bass Drum 1
+    "sd": 38,   # Acoustic Snare
+    "hh": 42,   # Closed Hi-Hat
+    "hho": 46,  # Open Hi-Hat
+}
+DRUM_CHANNEL = 9  # GM drums live on channel 10 (0-based 9)
+
+# Render patterns to a Standard MIDI File without waiting for real time
+def export_midi(patterns: List[Pattern], output_file: str, bpm: int = 120, loop_beats: int = 32,
+                loops: int = 1, ticks_per_beat: int = 480) -> mido.MidiFile:
+    beat_duration = 60 / bpm
+    eighth_beat_duration = beat_duration / 8
+    events = []  # (absolute tick, order, message); note_off sorts before note_on at the same tick
+
+    for loop in range(loops):
+        loop_offset = loop * loop_beats
+        for pattern in patterns:
+            midi_note = pattern.get("midi_note")
+            velocity = pattern.get("velocity", 100)
+            duration = pattern.get("duration", eighth_beat_duration)
+            sound = pattern.get("sound")
+
+            if velocity <= 0:
+                continue  # Silent in live playback too
+            if midi_note is not None:
+                note, channel = midi_note, 0
+            elif sound in drum_notes:
+                # Sample volumes are 0..1, MIDI velocities 0..127
+                note, channel = drum_notes[sound], DRUM_CHANNEL
+                velocity = round(velocity * 127)
+            else:
+                continue
+
+            velocity = max(1, min(127, int(velocity)))  # Keep quiet but audible hits audible
+            length = max(1, round(duration / beat_duration * ticks_per_beat))
+            for beat in pattern["beats"]:
+                if not 0 <= beat < loop_beats:
+                    continue  # play_pattern never reaches beats outside the loop
+                start = round((loop_offset + beat) * ticks_per_beat)
+                events.append((start, 1, mido.Message('note_on', note=note, velocity=velocity, channel=channel)))
+                events.append((start + length, 0, mido.Message('note_off', note=note, velocity=0, channel=channel)))
+
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    mid = mido.MidiFile(ticks_per_beat=ticks_per_beat)
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.MetaMessage('set_tempo', tempo=mido.bpm2tempo(bpm), time=0))
+
+    # Convert absolute ticks to delta times
+    last_tick = 0
+    for tick, _, msg in events:
+        track.append(msg.copy(time=tick - last_tick))
+        last_tick = tick
+    end_tick = loops * loop_beats * ticks_per_beat
+    track.append(mido.MetaMessage('end_of_track', time=max(0, end_tick - last_tick)))
+
+    mid.save(output_file)
+    print(f"Exported {len(events) // 2} notes ({loops} x {loop_beats} beats at {bpm} BPM) to '{output_file}'")
+    return mid
+
 def repeat(beats, size=4, times=2):
     repeated_beats = []
     repeated_beats.extend(beats)
@@ -123,6 +257,11 @@ beat_patterns = [
 ]
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play the arrangement, or bounce it to a MIDI file.")
+    parser.add_argument("--export", metavar="OUT.mid", help="Write the arrangement to a MIDI file instead of playing it")
+    parser.add_argument("--loops", type=int, default=1, help="Number of loop repeats to export (default: 1)")
+    args = parser.parse_args()
+
     try:
         bpm = 80  # Set your desired BPM here
         loop_beats = 8  # Set your desired loop duration in beats here
@@ -138,9 +277,12 @@ if __name__ == '__main__':
         for pattern in patterns:
             pattern["beats"] = [beat - min_beat for beat in pattern["beats"]]
 
-        print(f"Playing at {bpm} BPM for {loop_beats} beats. Press Ctrl+C to stop playback.")
-        while True:
-            play_pattern(patterns + beat_patterns, bpm=bpm, loop_beats=loop_beats)
+        if args.export:
+            export_midi(patterns + beat_patterns, args.export, bpm=bpm, loop_beats=loop_beats, loops=args.loops)
+        else:
+            print(f"Playing at {bpm} BPM for {loop_beats} beats. Press Ctrl+C to stop playback.")
+            while True:
+                play_pattern(patterns + beat_patterns, bpm=bpm, loop_beats=loop_beats)
     except KeyboardInterrupt:
         print("\nStopping playback.")
         if midi_out: